@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .utils import ensure_dir, now_iso
+
+ANSWER_CACHE_DEFAULT_PATH = "~/.cache/ecobot/answers.sqlite3"
+
+
+def payload_key(payload: Dict[str, Any]) -> str:
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Small in-memory LRU cache for model responses, keyed on the request
+    payload hash. Entries expire after `ttl` seconds.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 86400):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class AnswerCache:
+    """
+    Disk-backed cache of final, validated answers keyed on
+    (model, mode, marks, question), so repeated questions skip generation
+    and validation entirely, across sessions.
+
+    Opt-in via ECON_BOT_CACHE=1; ECON_BOT_CACHE_PATH overrides the sqlite
+    file. Both are read on first use.
+    """
+
+    def __init__(self, path: Optional[str] = None, enabled: Optional[bool] = None):
+        self.path = path
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, mode: str, marks: int, question: str) -> str:
+        return hashlib.sha256(f"{model}|{mode}|{marks}|{question}".encode("utf-8")).hexdigest()
+
+    def _active(self) -> bool:
+        if self.enabled is None:
+            self.enabled = os.getenv("ECON_BOT_CACHE", "").strip() == "1"
+        return self.enabled
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            path = self.path or os.getenv("ECON_BOT_CACHE_PATH", "").strip() or ANSWER_CACHE_DEFAULT_PATH
+            path = os.path.expanduser(path)
+            ensure_dir(os.path.dirname(path))
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, answer TEXT, ts TEXT)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _disable(self, e: Exception) -> None:
+        print(f"[Warn] answer cache disabled: {e}", file=sys.stderr)
+        self.enabled = False
+
+    def get(self, key: str) -> Optional[str]:
+        if not self._active():
+            return None
+        with self._lock:
+            try:
+                row = self._db().execute("SELECT answer FROM cache WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                self._disable(e)
+                return None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, answer: str) -> None:
+        if not self._active() or not answer:
+            return
+        with self._lock:
+            try:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO cache (key, answer, ts) VALUES (?, ?, ?)",
+                    (key, answer, now_iso()),
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                self._disable(e)
@@ -1,11 +1,26 @@
+import functools
 import os
-import json
 from dataclasses import dataclass
-from typing import Iterator, Optional
+from typing import Iterator, List
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from .utils import sleep_backoff, safe_strip
+from .cache import LLMCache, payload_key
+from .utils import json_dumps, json_loads, safe_strip
+
+# (connect, read) seconds: an unreachable host fails fast, while slow CPU
+# generations still get the full read budget.
+HTTP_TIMEOUT = (5, 120)
+
+# Below this temperature output is near-deterministic, so replies are cached.
+CACHE_MAX_TEMPERATURE = 0.25
+
+
+def _body_snippet(body: bytes, limit: int = 500) -> str:
+    # Decode only the head of a body for error messages.
+    return safe_strip(body[:limit].decode("utf-8", "replace"))
 
 
 @dataclass
@@ -21,96 +36,190 @@ class OllamaClient:
     Supports both streaming and non-streaming.
     """
 
-    def __init__(self, host: str, model: str):
+    _STOP = ("\nYou>", "\nUser>", "\nBot>", "\nBOT>")
+    # Options that never change between calls; only the per-call fields are merged in.
+    _BASE_OPTIONS = {
+        "num_ctx": 512,
+        "top_p": 0.9,
+        "repeat_penalty": 1.1,
+        "stop": list(_STOP),
+    }
+
+    def __init__(self, host: str, model: str, num_parallel: int = 4, keep_alive: str = "30m"):
         self.host = host.rstrip("/")
         self.model = model
+        self.keep_alive = keep_alive
+        self.num_parallel = max(1, int(num_parallel))
+        self.cache = LLMCache(maxsize=256, ttl=86400)
+
+        # One pooled keep-alive session, reused across turns and retries.
+        self.session = requests.Session()
+        # Transient 429/503/504s are retried by urllib3 on the same pool,
+        # with exponential backoff that honours Retry-After.
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist={429, 503, 504},
+            allowed_methods={"POST"},
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(
+            {
+                "Accept": "application/json",
+                "Content-Type": "application/json",
+                "Connection": "keep-alive",
+            }
+        )
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
 
     def set_model(self, model: str) -> None:
         self.model = model
 
+    def warmup(self, prompt: str = "") -> None:
+        """
+        Get the model loaded before the first real question. With `prompt`,
+        it is also prefilled (one token generated) so later prompts that
+        start with the same text reuse Ollama's cached prefix.
+        Failures are ignored.
+        """
+        if prompt:
+            url = f"{self.host}/api/chat"
+            payload = self._payload(prompt, max_new_tokens=1, temperature=0.0)
+            payload["stream"] = False
+        else:
+            url = f"{self.host}/api/generate"
+            payload = {"model": self.model, "prompt": "", "keep_alive": self.keep_alive}
+        try:
+            self.session.post(url, data=json_dumps(payload), timeout=HTTP_TIMEOUT)
+        except requests.RequestException:
+            pass
+
     def _payload(self, prompt: str, max_new_tokens: int, temperature: float) -> dict:
-        
+        options = {
+            **self._BASE_OPTIONS,
+            "num_predict": int(max_new_tokens),
+            "temperature": float(temperature),
+        }
         return {
             "model": self.model,
             "messages": [{"role": "user", "content": prompt}],
-            "options": {
-                "num_predict": int(max_new_tokens),
-                "temperature": float(temperature),
-                "num_ctx": 512,
-                "top_p": 0.9,
-                "repeat_penalty": 1.1,
-                "stop": ["\nYou>", "\nUser>", "\nBot>", "\nBOT>"],
-            },
+            "options": options,
+            "keep_alive": self.keep_alive,
         }
 
     def generate(self, prompt: str, max_new_tokens: int = 256, temperature: float = 0.2) -> LLMResult:
         url = f"{self.host}/api/chat"
         payload = self._payload(prompt, max_new_tokens, temperature)
+
+        key = None
+        if temperature < CACHE_MAX_TEMPERATURE:
+            key = payload_key(payload)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
         payload["stream"] = False
 
-        last_err: Optional[str] = None
-        for attempt in range(3):
-            try:
-                r = requests.post(url, json=payload, timeout=120)
-                status = r.status_code
-                if status in (429, 503, 504):
-                    last_err = f"Ollama temp error {status}: {safe_strip(r.text)}"
-                    sleep_backoff(attempt)
-                    continue
-                if status >= 400:
-                    raise RuntimeError(f"Ollama error {status}: {safe_strip(r.text)}")
-
-                data = r.json()
-                msg = data.get("message") or {}
-                text = (msg.get("content") or "").strip()
-                if not text:
-                    raise RuntimeError("Empty response from Ollama.")
-                return LLMResult(text=text, used_model=self.model, raw_status=status)
-
-            except Exception as e:
-                last_err = str(e)
-                sleep_backoff(attempt)
-
-        raise RuntimeError(last_err or "Ollama call failed after retries.")
-
-    def generate_stream(self, prompt: str, max_new_tokens: int = 256, temperature: float = 0.2) -> Iterator[str]:
+        try:
+            r = self.session.post(url, data=json_dumps(payload), timeout=HTTP_TIMEOUT)
+        except requests.RequestException as e:
+            raise RuntimeError(f"Ollama call failed: {e}") from e
+
+        status = r.status_code
+        if status >= 400:
+            raise RuntimeError(f"Ollama error {status}: {_body_snippet(r.content)}")
+
+        try:
+            data = json_loads(r.content)
+        except ValueError:
+            raise RuntimeError(f"Non-JSON response from {url}: {_body_snippet(r.content)}") from None
+        msg = data.get("message") or {}
+        text = (msg.get("content") or "").strip()
+        if not text:
+            raise RuntimeError("Empty response from Ollama.")
+        result = LLMResult(text=text, used_model=self.model, raw_status=status)
+        if key is not None:
+            self.cache.set(key, result)
+        return result
+
+    def generate_stream(
+        self, prompt: str, max_new_tokens: int = 256, temperature: float = 0.2, use_cache: bool = True
+    ) -> Iterator[str]:
         """
         Yields incremental text chunks from Ollama streaming API.
+        With use_cache=False the response cache is neither read nor written,
+        e.g. for retries whose previous reply was rejected.
         """
         url = f"{self.host}/api/chat"
         payload = self._payload(prompt, max_new_tokens, temperature)
-        payload["stream"] = True
 
-        last_err: Optional[str] = None
-        for attempt in range(3):
-            try:
-                with requests.post(url, json=payload, timeout=120, stream=True) as r:
-                    status = r.status_code
-                    if status in (429, 503, 504):
-                        last_err = f"Ollama temp error {status}: {safe_strip(r.text)}"
-                        sleep_backoff(attempt)
-                        continue
-                    if status >= 400:
-                        raise RuntimeError(f"Ollama error {status}: {safe_strip(r.text)}")
+        key = None
+        if use_cache and temperature < CACHE_MAX_TEMPERATURE:
+            key = payload_key(payload)
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached.text
+                return
+
+        payload["stream"] = True
 
-                    for line in r.iter_lines(decode_unicode=True):
-                        if not line:
-                            continue
-                        data = json.loads(line)
-                        msg = data.get("message") or {}
-                        chunk = msg.get("content") or ""
-                        if chunk:
-                            yield chunk
-                    return
+        try:
+            r = self.session.post(url, data=json_dumps(payload), timeout=HTTP_TIMEOUT, stream=True)
+        except requests.RequestException as e:
+            raise RuntimeError(f"Ollama streaming failed: {e}") from e
 
-            except Exception as e:
-                last_err = str(e)
-                sleep_backoff(attempt)
+        with r:
+            status = r.status_code
+            if status >= 400:
+                raise RuntimeError(f"Ollama error {status}: {_body_snippet(r.content)}")
 
-        raise RuntimeError(last_err or "Ollama streaming failed after retries.")
+            parts: List[str] = []
+            try:
+                for line in r.iter_lines(decode_unicode=False):
+                    if not line:
+                        continue
+                    try:
+                        data = json_loads(line)
+                    except ValueError:
+                        raise RuntimeError(f"Non-JSON stream line from {url}: {_body_snippet(line)}") from None
+                    msg = data.get("message") or {}
+                    chunk = msg.get("content") or ""
+                    if chunk:
+                        parts.append(chunk)
+                        yield chunk
+            except requests.RequestException as e:
+                # The connection can also drop mid-stream (e.g. Ollama restarting).
+                raise RuntimeError(f"Ollama streaming failed: {e}") from e
+
+        # Only a stream that ran to the end is worth caching.
+        text = "".join(parts).strip()
+        if key is not None and text:
+            self.cache.set(key, LLMResult(text=text, used_model=self.model, raw_status=status))
+
+
+@functools.lru_cache(maxsize=8)
+def _build_ollama_client(host: str, model: str, num_parallel: int) -> OllamaClient:
+    return OllamaClient(host=host, model=model, num_parallel=num_parallel)
 
 
 def load_client_from_env() -> OllamaClient:
+    """
+    Returns a process-wide client per (host, model, parallelism) so the
+    warm connection pool and response cache are shared by every caller.
+    """
     host = os.getenv("OLLAMA_HOST", "http://localhost:11434").strip()
     model = os.getenv("OLLAMA_MODEL", "llama3.2:1b").strip()
-    return OllamaClient(host=host, model=model)
+    num_parallel = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+    return _build_ollama_client(host, model, num_parallel)
@@ -1,14 +1,24 @@
+import asyncio
+import atexit
 import os
 import sys
 import re
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import replace
+from typing import List, Optional, Tuple
 
 from dotenv import load_dotenv
 
+from .cache import AnswerCache
 from .llm import load_client_from_env
-from .prompts import BotConfig, build_prompt_fast
+from .prompts import BotConfig, build_prompt_fast, mode_prefix
+from .semcache import SemanticCache
 from .utils import now_iso, strip_think_blocks, write_jsonl
 
+ANSWER_CACHE = AnswerCache()
+SEM_CACHE = SemanticCache()
+
 HELP_TEXT = """
 Commands:
   help
@@ -18,6 +28,7 @@ Commands:
   /notes <topic>
   /mcq <topic>
   /pyq <topic>
+  /batch <file>   (one topic per line, current mode)
   exit
 """
 
@@ -101,23 +112,84 @@ Common examiner expectations:
 2) Using the IS-LM framework, explain the relative effectiveness of fiscal and monetary policy.
 """
 
+# The whole /demo transcript is static, so it is assembled once at import.
+DEMO_OUTPUT = (
+    "\n--- DEMO: NOTES (2 marks) | Inflation ---\n"
+    f"\nBot> {DEMO_NOTES}\n\n"
+    "\n--- DEMO: MCQ (5 marks) | Demand-pull inflation ---\n"
+    f"\nBot> {DEMO_MCQ}\n\n"
+    "\n--- DEMO: PYQ (10 marks) | Explain IS-LM model ---\n"
+    f"\nBot> {DEMO_PYQ}\n"
+)
+
+
+RETRY_SUFFIX = (
+    "\n\nCRITICAL: Your previous output did NOT follow the required template.\n"
+    "Rewrite the FULL answer FROM SCRATCH, exactly in the template above.\n"
+    "Do NOT change headings, do NOT add extra sections, do NOT add any explanation.\n"
+)
+
+
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_ANSWER_KEY_RE = re.compile(
+    r"answer key:\s*1-[abcd],\s*2-[abcd],\s*3-[abcd],\s*4-[abcd],\s*5-[abcd]"
+)
 
 
 def normalize(text: str) -> str:
     if not text:
         return ""
     text = strip_think_blocks(text)
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
-    text = re.sub(r"\n{3,}", "\n\n", text).strip()
-    return text
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return _BLANK_LINES_RE.sub("\n\n", text)
 
 
 def looks_glued(text: str) -> bool:
-    letters = sum(c.isalpha() for c in text)
+    # Needs more than 120 letters, so shorter text can never qualify.
+    if len(text) <= 120:
+        return False
+    letters = sum(map(str.isalpha, text))
     spaces = text.count(" ")
     return letters > 120 and spaces < max(10, letters // 80)
 
 
+def stream_text(
+    client,
+    prompt: str,
+    max_new_tokens: int,
+    temperature: float,
+    cancel: Optional[threading.Event] = None,
+    mode: Optional[str] = None,
+    use_cache: bool = True,
+) -> str:
+    """
+    Collect a streamed reply. Streaming lets Ctrl-C (or `cancel`) stop the
+    model mid-answer: closing the stream drops the HTTP connection, which
+    makes Ollama abandon the generation. With `mode`, the stream is also
+    dropped as soon as it is clearly not following that mode's template.
+    """
+    chunks = client.generate_stream(
+        prompt, max_new_tokens=max_new_tokens, temperature=temperature, use_cache=use_cache
+    )
+    parts = []
+    watch = mode in _TEMPLATE_START_RE
+    try:
+        for chunk in chunks:
+            if cancel is not None and cancel.is_set():
+                break
+            parts.append(chunk)
+            # Check at line breaks until the template heading shows up.
+            if watch and "\n" in chunk:
+                text = "".join(parts)
+                if not looks_on_track(mode, text):
+                    break
+                watch = _TEMPLATE_START_RE[mode].search(text) is None
+    finally:
+        chunks.close()
+    return "".join(parts)
+
+
 def repair_spacing(client, text: str) -> str:
     prompt = (
         "Fix spacing and line breaks in the text below.\n"
@@ -129,6 +201,30 @@ def repair_spacing(client, text: str) -> str:
     return normalize(res.text)
 
 
+# First heading of each mode's template, matched case-insensitively in place.
+# Whitespace-tolerant so glued output still counts (repair_spacing fixes it).
+_TEMPLATE_START_RE = {
+    "notes": re.compile(r"key\s*terms:", re.IGNORECASE),
+    "mcq": re.compile(r"mcqs:", re.IGNORECASE),
+    "pyq": re.compile(r"how\s*to\s*structure\s*the\s*answer", re.IGNORECASE),
+}
+
+# Visible text allowed before the template heading before giving up.
+_MAX_PREAMBLE_CHARS = 200
+
+
+def looks_on_track(mode: str, text: str) -> bool:
+    """
+    False once a (possibly partial) answer has more than a short preamble
+    without reaching its template heading. <think> blocks don't count.
+    """
+    pattern = _TEMPLATE_START_RE.get(mode)
+    if pattern is None or len(text) <= _MAX_PREAMBLE_CHARS:
+        return True
+    visible = strip_think_blocks(text)
+    return len(visible) <= _MAX_PREAMBLE_CHARS or pattern.search(visible) is not None
+
+
 def trim_to_template(mode: str, text: str) -> str:
     """
     Keep only the part of the answer starting from the main heading
@@ -137,87 +233,81 @@ def trim_to_template(mode: str, text: str) -> str:
     if not text:
         return ""
 
-    lower = text.lower()
-
-    if mode == "notes":
-        anchor = "key terms:"
-    elif mode == "mcq":
-        anchor = "mcqs:"
-    elif mode == "pyq":
-        anchor = "how to structure the answer"
-    else:
+    pattern = _TEMPLATE_START_RE.get(mode)
+    if pattern is None:
         return text
 
-    idx = lower.find(anchor)
-    if idx == -1:
+    m = pattern.search(text)
+    if m is None:
         return text 
 
-    return text[idx:].strip()
-
+    # Callers pass normalize()d text, so the tail is already stripped.
+    return text[m.start():]
+
+
+# Substrings each mode's (lowercased) answer must contain.
+_REQUIRED_ANCHORS = {
+    "notes": frozenset(
+        ["key terms:", "core points:", "diagram:", "exam questions:"]
+        + ["1.", "2.", "3.", "1)", "2)", "3)", "- "]
+    ),
+    "mcq": frozenset(
+        ["mcqs:", "answer key:", "1.", "2.", "3.", "4.", "5.", "a)", "b)", "c)", "d)"]
+    ),
+    "pyq": frozenset(
+        [
+            "how to structure the answer (intro/body/conclusion):",
+            "key points to include:",
+            "common examiner expectations:",
+            "2 sample past-year style questions:",
+            "1)",
+            "2)",
+        ]
+    ),
+}
 
 def validate(mode: str, text: str) -> bool:
-    t = (text or "").lower()
+    required = _REQUIRED_ANCHORS.get(mode)
+    if required is None:
+        return False
 
-    if mode == "notes":
-        has_sections = all(
-            x in t for x in ["key terms:", "core points:", "diagram:", "exam questions:"]
-        )
-        has_core_nums = all(x in t for x in ["1.", "2.", "3."])
-        has_exam_nums = all(x in t for x in ["1)", "2)", "3)"])
-        has_bullets = "- " in text
-        return has_sections and has_core_nums and has_exam_nums and has_bullets
+    t = (text or "").lower()
+    if not all(a in t for a in required):
+        return False
 
     if mode == "mcq":
-        
-        has_header = "mcqs:" in t and "answer key:" in t
+        return _ANSWER_KEY_RE.search(t) is not None
+    return True
 
-        
-        q_ok = all(f"{i}." in t for i in ["1", "2", "3", "4", "5"])
-
-        
-        opts_ok = all(x in t for x in ["a)", "b)", "c)", "d)"])
-
-        key_ok = (
-            re.search(
-                r"answer key:\s*1-[abcd],\s*2-[abcd],\s*3-[abcd],\s*4-[abcd],\s*5-[abcd]",
-                t,
-            )
-            is not None
-        )
 
-        return has_header and q_ok and opts_ok and key_ok
-
-    if mode == "pyq":
-        has_sections = all(
-            x in t
-            for x in [
-                "how to structure the answer (intro/body/conclusion):",
-                "key points to include:",
-                "common examiner expectations:",
-                "2 sample past-year style questions:",
-            ]
-        )
-        has_samples = "1)" in t and "2)" in t
-        return has_sections and has_samples
 
-    return False
 
 
+# Fallback templates are plain strings with {topic} slots, split once so a
+# fallback is a single str.join with the topic.
+_FALLBACK_NOTES = """Key Terms:
+- {topic}
+- Policy objectives
+- Policy instruments
+- Transmission mechanism
+- Macroeconomic stabilization
 
+Core Points:
+1. {topic} is an important macroeconomic concept used to influence aggregate demand and overall economic activity.
+2. It typically works through specific instruments (such as interest rates or money supply) to achieve goals like price stability and growth.
+3. In exams, you should always define {topic}, mention its main objectives, and briefly explain how it affects the economy.
 
+Diagram:
+- Axes: Relevant policy variable on vertical, output or income on horizontal
+- Shift: Policy change shifts the relevant curve showing its impact on output and stability
 
-def build_fallback_answer(mode: str, question: str) -> str:
-    """
-    Deterministic, template-perfect fallback used when the model
-    fails to follow the required structure after several retries.
-    """
-    topic = (question or "").strip()
-    if not topic:
-        topic = "the topic"
+Exam Questions:
+1) Define {topic} and state its main objectives.
+2) Explain briefly how {topic} can influence aggregate demand.
+3) Write short notes on the instruments commonly used in {topic}.
+"""
 
-    if mode == "mcq":
-        # Simple generic 5-MCQ block tied to the topic
-        return f"""MCQs:
+_FALLBACK_MCQ = """MCQs:
 1. Which of the following best describes {topic}?
 A) It is unrelated to the economy
 B) It is a concept used in macroeconomics
@@ -252,31 +342,7 @@ Answer Key:
 1-B, 2-B, 3-A, 4-B, 5-B
 """
 
-    if mode == "notes":
-        return f"""Key Terms:
-- {topic}
-- Policy objectives
-- Policy instruments
-- Transmission mechanism
-- Macroeconomic stabilization
-
-Core Points:
-1. {topic} is an important macroeconomic concept used to influence aggregate demand and overall economic activity.
-2. It typically works through specific instruments (such as interest rates or money supply) to achieve goals like price stability and growth.
-3. In exams, you should always define {topic}, mention its main objectives, and briefly explain how it affects the economy.
-
-Diagram:
-- Axes: Relevant policy variable on vertical, output or income on horizontal
-- Shift: Policy change shifts the relevant curve showing its impact on output and stability
-
-Exam Questions:
-1) Define {topic} and state its main objectives.
-2) Explain briefly how {topic} can influence aggregate demand.
-3) Write short notes on the instruments commonly used in {topic}.
-"""
-
-    if mode == "pyq":
-        return f"""How to structure the answer (Intro/Body/Conclusion):
+_FALLBACK_PYQ = """How to structure the answer (Intro/Body/Conclusion):
 - Intro: Define {topic} and place it within the relevant branch of economics.
 - Body: Explain the key concepts, mechanisms, and diagrams associated with {topic}.
 - Conclusion: Summarize the main insights and mention any limitations or policy implications.
@@ -298,59 +364,179 @@ Common examiner expectations:
 2) Discuss the main features, advantages and limitations of {topic} with the help of a suitable diagram.
 """
 
-   
-    return f"{topic}."
+_FALLBACK_PARTS = {
+    "notes": _FALLBACK_NOTES.split("{topic}"),
+    "mcq": _FALLBACK_MCQ.split("{topic}"),
+    "pyq": _FALLBACK_PYQ.split("{topic}"),
+}
+
+
+def build_fallback_answer(mode: str, question: str) -> str:
+    """
+    Deterministic, template-perfect fallback used when the model
+    fails to follow the required structure after several retries.
+    """
+    topic = (question or "").strip()
+    if not topic:
+        topic = "the topic"
+
+    parts = _FALLBACK_PARTS.get(mode)
+    if parts is None:
+        return f"{topic}."
+    return topic.join(parts)
 
 
 
 
 
-def enforced_generate(client, cfg: BotConfig, question: str, log_path: str) -> str:
-    base_prompt = build_prompt_fast(question, cfg)
+# Per mode: (max_new_tokens, first-attempt temperature, retry temperature).
+_GEN_PARAMS = {
+    "notes": (450, 0.2, 0.0),
+    "mcq": (900, 0.1, 0.0),
+    "pyq": (750, 0.2, 0.0),
+}
+_DEFAULT_GEN_PARAMS = (750, 0.2, 0.0)
 
-   
-    max_new = 450 if cfg.mode == "notes" else 900 if cfg.mode == "mcq" else 750
 
-    answer: Optional[str] = None
-    prompt = base_prompt
+def generation_params(mode: str) -> Tuple[int, float, float]:
+    """(max_new_tokens, first-attempt temperature, retry temperature) for a mode."""
+    return _GEN_PARAMS.get(mode, _DEFAULT_GEN_PARAMS)
+
+
+def run_attempt(
+    client,
+    mode: str,
+    prompt: str,
+    max_new: int,
+    temperature: float,
+    cancel: Optional[threading.Event] = None,
+    use_cache: bool = True,
+) -> str:
+    answer = normalize(stream_text(client, prompt, max_new, temperature, cancel, mode, use_cache))
+    # Cancelled or abandoned as off-template: not worth a spacing repair.
+    if (cancel is not None and cancel.is_set()) or not looks_on_track(mode, answer):
+        return answer
 
     
-    temperature = 0.1 if cfg.mode == "mcq" else 0.2
+    if looks_glued(answer):
+        answer = repair_spacing(client, answer)
 
-    success = False
-    used_fallback = False
+    
+    return trim_to_template(mode, answer)
 
-    for attempt in range(5):
-        res = client.generate(prompt, max_new_tokens=max_new, temperature=temperature)
-        answer = normalize(res.text)
 
-        
-        if looks_glued(answer):
-            answer = repair_spacing(client, answer)
+def speculative_attempts(
+    client, mode: str, prompts: List[Tuple[str, float, bool]], max_new: int
+) -> Optional[str]:
+    """
+    Run several (prompt, temperature, use_cache) attempts at once and return
+    the first answer that validates; the others are cancelled. None if none
+    validate. A client error is only raised if every attempt failed with one.
+    """
+    cancel = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=len(prompts), thread_name_prefix="attempt")
+    errors = []
+    try:
+        futures = [pool.submit(run_attempt, client, mode, p, max_new, t, cancel, c) for p, t, c in prompts]
+        for fut in as_completed(futures):
+            try:
+                answer = fut.result()
+            except RuntimeError as e:
+                errors.append(e)
+                continue
+            if validate(mode, answer):
+                return answer
+        if len(errors) == len(futures):
+            raise errors[0]
+        return None
+    finally:
+        cancel.set()
+        pool.shutdown(wait=False, cancel_futures=True)
 
-        
-        answer = trim_to_template(cfg.mode, answer)
+
+def speculation_enabled(client) -> bool:
+    """
+    Racing attempts is opt-in via ECON_BOT_SPECULATE=1: on CPU two concurrent
+    decodes slow each other down, so it only pays off with spare GPU slots.
+    """
+    return client.num_parallel > 1 and os.getenv("ECON_BOT_SPECULATE", "").strip() == "1"
+
+
+def solve_question(
+    client,
+    cfg: BotConfig,
+    question: str,
+    speculate: bool = False,
+    cancel: Optional[threading.Event] = None,
+) -> Tuple[str, bool, bool]:
+    """
+    Run the generate/validate/retry loop for one question without printing.
+    With `speculate`, the first attempt races the first retry. Setting
+    `cancel` stops the current stream and skips the remaining attempts.
+    Returns (answer, validated, used_fallback).
+    """
+    base_prompt = build_prompt_fast(question, cfg)
+    max_new, temperature, retry_temperature = generation_params(cfg.mode)
+
+    answer: Optional[str] = None
+    prompt = base_prompt
+    retry_prompt = base_prompt + RETRY_SUFFIX
+
+    success = False
+    used_fallback = False
+    attempts = 5
+
+    answer_key = AnswerCache.key(client.model, cfg.mode, cfg.marks, question)
+    namespace = f"{client.model}|{cfg.mode}|{cfg.marks}"
+    cached = ANSWER_CACHE.get(answer_key)
+    if cached is None:
+        cached = SEM_CACHE.lookup(namespace, question)
+    if cached is not None:
+        answer = cached
+        success = True
+        attempts = 0
+    elif speculate:
+        # The server has spare slots: race the first attempt against the
+        # first retry instead of waiting for attempt one to fail.
+        answer = speculative_attempts(
+            client,
+            cfg.mode,
+            [(base_prompt, temperature, True), (retry_prompt, retry_temperature, False)],
+            max_new,
+        )
+        success = answer is not None
+        attempts = 0 if success else 3
+        prompt, temperature = retry_prompt, retry_temperature
+
+    for attempt in range(attempts):
+        if cancel is not None and cancel.is_set():
+            break
+        # Retries skip the response cache: at low temperature it would just
+        # replay the reply that was rejected.
+        answer = run_attempt(client, cfg.mode, prompt, max_new, temperature, cancel, prompt is base_prompt)
 
         if validate(cfg.mode, answer):
             success = True
             break
-        temperature = 0.0
-        prompt = (
-            base_prompt
-            + "\n\nCRITICAL: Your previous output did NOT follow the required template.\n"
-            "Rewrite the FULL answer FROM SCRATCH, exactly in the template above.\n"
-            "Do NOT change headings, do NOT add extra sections, do NOT add any explanation.\n"
-        )
+        temperature = retry_temperature
+        prompt = retry_prompt
 
     if not success:
       
         answer = build_fallback_answer(cfg.mode, question)
         used_fallback = True
         success = True  
+    elif cached is None:
+        ANSWER_CACHE.set(answer_key, answer or "")
+        SEM_CACHE.add(namespace, question, answer or "")
+
+    return answer or "", success, used_fallback
 
-    final = answer or ""
 
-    print("\nBot> " + final + "\n")
+def report_answer(
+    client, cfg: BotConfig, question: str, final: str, success: bool, used_fallback: bool, log_path: str
+) -> None:
+    print(f"\nBot> {final}\n")
 
     if log_path:
         write_jsonl(
@@ -367,10 +553,215 @@ def enforced_generate(client, cfg: BotConfig, question: str, log_path: str) -> s
             },
         )
 
+
+def enforced_generate(client, cfg: BotConfig, question: str, log_path: str) -> str:
+    final, success, used_fallback = solve_question(client, cfg, question, speculation_enabled(client))
+    report_answer(client, cfg, question, final, success, used_fallback, log_path)
     return final
 
 
+async def aenforced_generate(
+    client, cfg: BotConfig, question: str, cancel: Optional[threading.Event] = None
+) -> Tuple[str, bool, bool]:
+    return await asyncio.to_thread(solve_question, client, cfg, question, False, cancel)
+
+
+async def batch_enforced_generate(
+    client,
+    cfg: BotConfig,
+    questions: List[str],
+    log_path: str,
+    modes: Optional[List[str]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> List[str]:
+    """
+    Answer several questions concurrently (bounded by the client's
+    parallelism, one stream per question: no speculative attempts), then
+    print and log them in input order. `modes`
+    optionally gives a mode per question; otherwise cfg.mode is used.
+    A question whose client call fails is reported as an error (and ""
+    returned for it) without stopping the others. If the batch itself is
+    cancelled or fails, `cancel` is set so worker threads stop streaming
+    instead of running their remaining attempts.
+    """
+    if modes and len(modes) != len(questions):
+        raise ValueError(f"got {len(modes)} modes for {len(questions)} questions")
+    cfgs = [replace(cfg, mode=m) for m in modes] if modes else [cfg] * len(questions)
+    sem = asyncio.Semaphore(client.num_parallel)
+    if cancel is None:
+        cancel = threading.Event()
+
+    async def one(c: BotConfig, q: str):
+        async with sem:
+            try:
+                return await aenforced_generate(client, c, q, cancel)
+            except RuntimeError as e:
+                return e
+
+    try:
+        results = await asyncio.gather(*(one(c, q) for c, q in zip(cfgs, questions)))
+    except BaseException:
+        # asyncio.run waits for to_thread workers before re-raising Ctrl-C.
+        cancel.set()
+        raise
+
+    finals = []
+    for c, q, result in zip(cfgs, questions, results):
+        if isinstance(result, RuntimeError):
+            print(f"[Error] {q}: {result}\n")
+            finals.append("")
+            continue
+        final, success, used_fallback = result
+        report_answer(client, c, q, final, success, used_fallback, log_path)
+        finals.append(final)
+    return finals
+
+
+def warmup_in_background(client, mode: str) -> None:
+    threading.Thread(
+        target=client.warmup, args=(mode_prefix(mode),), name="ollama-warmup", daemon=True
+    ).start()
+
+
+def ask(client, cfg: BotConfig, question: str, log_path: str) -> None:
+    try:
+        enforced_generate(client, cfg, question, log_path)
+    except KeyboardInterrupt:
+        print("\n[Interrupted]\n")
+    except RuntimeError as e:
+        print(f"[Error] {e}\n")
+
+
+_VALID_MARKS = frozenset({2, 5, 10})
+
+
+# Command handlers take (arg, cfg, client, log_path) and return the config to
+# continue with (BotConfig is frozen), or None to end the session.
+def _cmd_help(arg: str, cfg: BotConfig, client, log_path: str) -> Optional[BotConfig]:
+    print(HELP_TEXT)
+    return cfg
+
+
+def _cmd_exit(arg: str, cfg: BotConfig, client, log_path: str) -> Optional[BotConfig]:
+    print("Bye!")
+    return None
+
 
+def _cmd_marks(arg: str, cfg: BotConfig, client, log_path: str) -> Optional[BotConfig]:
+    try:
+        marks = int(arg.split()[0])
+    except (IndexError, ValueError):
+        marks = None
+    if marks not in _VALID_MARKS:
+        print("❌ marks must be 2, 5, or 10.")
+        return cfg
+    cfg = replace(cfg, marks=marks)
+    print(f"✅ marks set to: {cfg.marks}")
+    return cfg
+
+
+def _cmd_model(arg: str, cfg: BotConfig, client, log_path: str) -> Optional[BotConfig]:
+    if not arg:
+        print("❌ Provide model name.")
+        return cfg
+    client.set_model(arg)
+    warmup_in_background(client, cfg.mode)
+    print(f"✅ model set to: {client.model}")
+    return cfg
+
+
+def _cmd_demo(arg: str, cfg: BotConfig, client, log_path: str) -> Optional[BotConfig]:
+    print(DEMO_OUTPUT)
+    return cfg
+
+
+def _cmd_batch(arg: str, cfg: BotConfig, client, log_path: str) -> Optional[BotConfig]:
+    try:
+        with open(arg, encoding="utf-8") as f:
+            topics = [ln.strip() for ln in f if ln.strip()]
+    except OSError as e:
+        print(f"❌ cannot read {arg}: {e}")
+        return cfg
+    cancel = threading.Event()
+    try:
+        asyncio.run(batch_enforced_generate(client, cfg, topics, log_path, cancel=cancel))
+    except KeyboardInterrupt:
+        cancel.set()
+        print("\n[Interrupted]\n")
+    except RuntimeError as e:
+        print(f"[Error] {e}\n")
+    return cfg
+
+
+def _mode_command(mode: str):
+    """Handler for /notes, /mcq and /pyq: switch mode and answer the topic."""
+
+    def handler(arg: str, cfg: BotConfig, client, log_path: str) -> Optional[BotConfig]:
+        if not arg:
+            print("❌ Provide a topic.")
+            return cfg
+        cfg = replace(cfg, mode=mode)
+        ask(client, cfg, arg, log_path)
+        return cfg
+
+    return handler
+
+
+# Commands that take no argument only match the whole input, so a question
+# such as "exit polls and economics" still reaches the model.
+_NO_ARG_COMMANDS = frozenset({"help", "?", "exit", "/demo"})
+
+COMMANDS = {
+    "help": _cmd_help,
+    "?": _cmd_help,
+    "exit": _cmd_exit,
+    "marks": _cmd_marks,
+    "model": _cmd_model,
+    "/demo": _cmd_demo,
+    "/batch": _cmd_batch,
+    "/notes": _mode_command("notes"),
+    "/mcq": _mode_command("mcq"),
+    "/pyq": _mode_command("pyq"),
+}
+
+
+HISTORY_FILE = os.path.expanduser("~/.ecobot_history")
+
+
+def setup_readline() -> None:
+    """
+    Line editing, persistent history and tab-completion of commands, so
+    earlier questions can be recalled instead of retyped.
+    Not available on plain Windows consoles; skipped there.
+    """
+    try:
+        import readline
+    except ImportError:
+        return
+
+    try:
+        readline.read_history_file(HISTORY_FILE)
+    except OSError:
+        pass
+    readline.set_history_length(1000)
+
+    def save_history() -> None:
+        try:
+            readline.write_history_file(HISTORY_FILE)
+        except OSError:
+            pass
+
+    atexit.register(save_history)
+
+    words = sorted(COMMANDS)
+
+    def complete(text: str, state: int) -> Optional[str]:
+        matches = [w for w in words if w.startswith(text)]
+        return matches[state] if state < len(matches) else None
+
+    readline.set_completer_delims(" \t\n")
+    readline.set_completer(complete)
+    readline.parse_and_bind("tab: complete")
 
 
 def main():
@@ -385,6 +776,11 @@ def main():
 
     cfg = BotConfig(mode="notes", marks=2)
 
+    # Load the model and prefill the default mode's prompt prefix while the
+    # user types their first question.
+    warmup_in_background(client, cfg.mode)
+    setup_readline()
+
     print("📘 Economics Explainer Bot (CLI)")
     print(f"Model: {client.model}")
     print("Type 'help' for commands.\n")
@@ -399,64 +795,19 @@ def main():
         if not user_in:
             continue
 
-        if user_in in ("help", "?"):
-            print(HELP_TEXT)
-            continue
-        if user_in == "exit":
-            print("Bye!")
-            break
-
-        if user_in.startswith("marks "):
-            try:
-                cfg.marks = int(user_in.split()[1])
-                print(f"✅ marks set to: {cfg.marks}")
-            except Exception:
-                print("❌ marks must be 2, 5, or 10.")
-            continue
-
-        if user_in.startswith("model "):
-            m = user_in.replace("model", "", 1).strip()
-            if not m:
-                print("❌ Provide model name.")
-                continue
-            client.set_model(m)
-            print(f"✅ model set to: {client.model}")
-            continue
-
-       
-        if user_in == "/demo":
-            print("\n--- DEMO: NOTES (2 marks) | Inflation ---")
-            print("\nBot> " + DEMO_NOTES + "\n")
-
-            print("\n--- DEMO: MCQ (5 marks) | Demand-pull inflation ---")
-            print("\nBot> " + DEMO_MCQ + "\n")
-
-            print("\n--- DEMO: PYQ (10 marks) | Explain IS-LM model ---")
-            print("\nBot> " + DEMO_PYQ + "\n")
-            continue
-
-     
-        if user_in.startswith("/notes "):
-            cfg.mode = "notes"
-            q = user_in.replace("/notes", "", 1).strip()
-            enforced_generate(client, cfg, q, log_path)
-            continue
-
-        if user_in.startswith("/mcq "):
-            cfg.mode = "mcq"
-            q = user_in.replace("/mcq", "", 1).strip()
-            enforced_generate(client, cfg, q, log_path)
-            continue
+        cmd, _, rest = user_in.partition(" ")
+        rest = rest.strip()
 
-        if user_in.startswith("/pyq "):
-            cfg.mode = "pyq"
-            q = user_in.replace("/pyq", "", 1).strip()
-            enforced_generate(client, cfg, q, log_path)
+        handler = COMMANDS.get(cmd)
+        if handler and not (rest and cmd in _NO_ARG_COMMANDS):
+            cfg = handler(rest, cfg, client, log_path)
+            if cfg is None:
+                break
             continue
 
         
-        cfg.mode = "notes"
-        enforced_generate(client, cfg, user_in, log_path)
+        cfg = replace(cfg, mode="notes")
+        ask(client, cfg, user_in, log_path)
 
 
 if __name__ == "__main__":
@@ -1,10 +1,11 @@
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Literal
 
 Mode = Literal["notes", "mcq", "pyq"]
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BotConfig:
     mode: Mode = "notes"
     marks: int = 5
@@ -114,14 +115,35 @@ def mode_format(mode: Mode) -> str:
     return {"notes": FORMAT_NOTES, "mcq": FORMAT_MCQ, "pyq": FORMAT_PYQ}[mode]
 
 
-def build_prompt_fast(user_question: str, cfg: BotConfig) -> str:
-    topic_line = f"Topic context: {cfg.topic}\n" if cfg.topic.strip() else ""
-    return (
-        f"{SYSTEM_RULES}\n"
-        f"{topic_line}"
-        f"Mode: {cfg.mode}\n"
-        f"Marks: {cfg.marks}\n\n"
-        f"{mode_format(cfg.mode)}\n"
-        f"User question: {user_question}\n\n"
-        f"Answer:"
+# Everything that depends only on the mode comes first, so every prompt of a
+# mode (and every retry of it) shares one long, byte-identical prefix that
+# Ollama can keep in its KV cache instead of prefilling it again.
+_MODE_PREFIX = {mode: f"{SYSTEM_RULES}\n{mode_format(mode)}\n" for mode in ("notes", "mcq", "pyq")}
+_MODE_HEAD = {mode: f"Mode: {mode}\nMarks: " for mode in _MODE_PREFIX}
+
+
+def mode_prefix(mode: Mode) -> str:
+    """The static, question-independent start of every prompt for `mode`."""
+    return _MODE_PREFIX[mode]
+
+
+@lru_cache(maxsize=256)
+def _build_prompt_fast(mode: Mode, marks: int, topic: str, user_question: str) -> str:
+    topic_line = f"Topic context: {topic}\n" if topic.strip() else ""
+    return "".join(
+        (
+            _MODE_PREFIX[mode],
+            topic_line,
+            _MODE_HEAD[mode],
+            str(marks),
+            "\n\nUser question: ",
+            user_question,
+            "\n\nAnswer:",
+        )
     )
+
+
+def build_prompt_fast(user_question: str, cfg: BotConfig) -> str:
+    # Same (mode, marks, topic, question) always yields the same prompt text,
+    # which also keeps the response cache keys byte-identical.
+    return _build_prompt_fast(cfg.mode, cfg.marks, cfg.topic, user_question)
@@ -0,0 +1,182 @@
+import hashlib
+import os
+import sys
+import threading
+from typing import List, Optional
+
+from .utils import ensure_dir, json_dumps, json_loads
+
+# Opt-in via ECON_SEM_CACHE=1: needs numpy + sentence-transformers and a
+# local copy of the encoder. Env vars are read on first use, after .env loads.
+SEM_CACHE_DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+SEM_CACHE_DEFAULT_DIR = "~/.cache/ecobot"
+SEM_CACHE_THRESHOLD = 0.92
+
+_ENCODER = None
+_ENCODER_LOCK = threading.Lock()
+
+
+def _encoder_model() -> str:
+    return os.getenv("ECON_SEM_CACHE_MODEL", SEM_CACHE_DEFAULT_MODEL).strip()
+
+
+def _encoder():
+    global _ENCODER
+    with _ENCODER_LOCK:
+        if _ENCODER is None:
+            from sentence_transformers import SentenceTransformer
+
+            _ENCODER = SentenceTransformer(_encoder_model())
+        return _ENCODER
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour answer cache over question embeddings.
+
+    Embeddings are kept unit-normalised in one float32 matrix, with
+    parallel lists for the namespace (model/mode/marks) and the answer,
+    so a lookup is a single matrix-vector product.
+
+    Entries persist across sessions in `path` (ECON_SEM_CACHE_DIR, default
+    ~/.cache/ecobot), one file pair per encoder: raw float32 rows in
+    semcache-<id>.f32 and the matching namespace/answer records in
+    semcache-<id>.jsonl. Both are loaded on first use and appended on add().
+    """
+
+    def __init__(
+        self,
+        threshold: float = SEM_CACHE_THRESHOLD,
+        enabled: Optional[bool] = None,
+        path: Optional[str] = None,
+    ):
+        self.threshold = threshold
+        self.enabled = enabled
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._emb = None
+        self._size = 0
+        self._namespaces: List[str] = []
+        self._answers: List[str] = []
+        self._files = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _active(self) -> bool:
+        if self.enabled is None:
+            self.enabled = os.getenv("ECON_SEM_CACHE", "").strip() == "1"
+        return self.enabled
+
+    def _embed(self, text: str):
+        import numpy as np
+
+        vec = _encoder().encode(text, convert_to_numpy=True).astype(np.float32)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+    def _append(self, q) -> None:
+        import numpy as np
+
+        if self._emb is None:
+            self._emb = np.empty((64, q.shape[0]), dtype=np.float32)
+        elif self._size == self._emb.shape[0]:
+            grown = np.empty((self._size * 2, q.shape[0]), dtype=np.float32)
+            grown[: self._size] = self._emb
+            self._emb = grown
+        self._emb[self._size] = q
+        self._size += 1
+
+    def _disable_disk(self, e: Exception) -> None:
+        print(f"[Warn] semantic cache not persisted: {e}", file=sys.stderr)
+        self._files = None
+
+    def _load(self, dim: int) -> None:
+        # Caller holds self._lock.
+        if self._loaded:
+            return
+        self._loaded = True
+        import numpy as np
+
+        folder = self.path or os.getenv("ECON_SEM_CACHE_DIR", "").strip() or SEM_CACHE_DEFAULT_DIR
+        folder = os.path.expanduser(folder)
+        stem = "semcache-" + hashlib.sha1(_encoder_model().encode("utf-8")).hexdigest()[:8]
+        vec_path = os.path.join(folder, stem + ".f32")
+        meta_path = os.path.join(folder, stem + ".jsonl")
+        try:
+            ensure_dir(folder)
+            records = []
+            if os.path.exists(meta_path):
+                with open(meta_path, "rb") as f:
+                    for line in f:
+                        try:
+                            records.append(json_loads(line))
+                        except ValueError:
+                            break  # torn write at the end
+            vecs = np.empty(0, dtype=np.float32)
+            if os.path.exists(vec_path):
+                vecs = np.fromfile(vec_path, dtype=np.float32)
+            rows = min(len(records), vecs.size // dim)
+            if rows != len(records) or rows * dim != vecs.size:
+                # An interrupted add() left the files out of step: keep the common rows.
+                vecs[: rows * dim].tofile(vec_path)
+                with open(meta_path, "wb") as f:
+                    f.writelines(json_dumps(r) + b"\n" for r in records[:rows])
+        except OSError as e:
+            self._disable_disk(e)
+            return
+
+        for i in range(rows):
+            self._append(vecs[i * dim : (i + 1) * dim])
+            self._namespaces.append(records[i]["ns"])
+            self._answers.append(records[i]["answer"])
+        self._files = (vec_path, meta_path)
+
+    def lookup(self, namespace: str, question: str) -> Optional[str]:
+        if not self._active() or not question:
+            return None
+        try:
+            q = self._embed(question)
+        except Exception:
+            # Missing deps or encoder weights: stay out of the way.
+            self.enabled = False
+            return None
+
+        with self._lock:
+            self._load(q.shape[0])
+            if self._size:
+                scores = self._emb[: self._size] @ q
+                for i in scores.argsort()[::-1]:
+                    if scores[i] <= self.threshold:
+                        break
+                    if self._namespaces[i] == namespace:
+                        self.hits += 1
+                        return self._answers[i]
+            self.misses += 1
+        return None
+
+    def add(self, namespace: str, question: str, answer: str) -> None:
+        if not self._active() or not question or not answer:
+            return
+        try:
+            q = self._embed(question)
+        except Exception:
+            self.enabled = False
+            return
+
+        with self._lock:
+            self._load(q.shape[0])
+            self._append(q)
+            self._namespaces.append(namespace)
+            self._answers.append(answer)
+            if self._files is None:
+                return
+            vec_path, meta_path = self._files
+            try:
+                # Vectors first: on load, a vector without its record is dropped.
+                with open(vec_path, "ab") as f:
+                    f.write(q.tobytes())
+                with open(meta_path, "ab") as f:
+                    f.write(json_dumps({"ns": namespace, "answer": answer}) + b"\n")
+            except OSError as e:
+                self._disable_disk(e)
@@ -1,13 +1,44 @@
+import atexit
 import json
 import os
-import time
+import queue
 import re
-from datetime import datetime
-from typing import Any, Dict, Optional
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+
+def json_dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# (epoch second, formatted) of the last call; swapped as one tuple so
+# concurrent callers never see a mismatched pair.
+_NOW_CACHE = (-1, "")
 
 
 def now_iso() -> str:
-    return datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    global _NOW_CACHE
+    sec = int(time.time())
+    cached_sec, cached_iso = _NOW_CACHE
+    if sec != cached_sec:
+        cached_iso = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(sec))
+        _NOW_CACHE = (sec, cached_iso)
+    return cached_iso
 
 
 def ensure_dir(path: str) -> None:
@@ -15,10 +46,56 @@ def ensure_dir(path: str) -> None:
         os.makedirs(path, exist_ok=True)
 
 
+# JSONL records are written by one daemon thread that keeps each log file
+# open, so the CLI loop never waits on open()/close() or the disk.
+_LOG_Q: "queue.SimpleQueue" = queue.SimpleQueue()
+_LOG_THREAD: Optional[threading.Thread] = None
+_LOG_LOCK = threading.Lock()
+
+
+def _log_worker() -> None:
+    handles: Dict[str, Any] = {}
+    try:
+        while True:
+            item = _LOG_Q.get()
+            if item is None:
+                break
+            path, record = item
+            try:
+                fh = handles.get(path)
+                if fh is None:
+                    ensure_dir(os.path.dirname(path))
+                    # O_APPEND keeps each line write atomic if several
+                    # processes share one log file.
+                    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                    fh = handles[path] = os.fdopen(fd, "ab", buffering=1 << 16)
+                fh.write(json_dumps(record) + b"\n")
+            except OSError as e:
+                print(f"[Warn] could not write log {path}: {e}", file=sys.stderr)
+            if _LOG_Q.empty():
+                for fh in handles.values():
+                    fh.flush()
+    finally:
+        for fh in handles.values():
+            fh.close()
+
+
+def _stop_log_worker() -> None:
+    if _LOG_THREAD is not None and _LOG_THREAD.is_alive():
+        _LOG_Q.put(None)
+        _LOG_THREAD.join(timeout=5)
+
+
 def write_jsonl(path: str, record: Dict[str, Any]) -> None:
-    ensure_dir(os.path.dirname(path))
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    """Queue one record for appending to `path`; returns immediately."""
+    global _LOG_THREAD
+    if _LOG_THREAD is None:
+        with _LOG_LOCK:
+            if _LOG_THREAD is None:
+                _LOG_THREAD = threading.Thread(target=_log_worker, name="jsonl-writer", daemon=True)
+                _LOG_THREAD.start()
+                atexit.register(_stop_log_worker)
+    _LOG_Q.put((path, record))
 
 
 def clamp_chat_history(messages, max_turns: int = 6):
@@ -35,14 +112,11 @@ def safe_strip(text: Optional[str]) -> str:
     return " ".join(text.strip().split())
 
 
-def sleep_backoff(attempt: int) -> None:
-    t = min(8, 2 ** attempt)
-    time.sleep(t)
+# Closed <think>...</think> blocks, or an unclosed <think> running to the end.
+_THINK_RE = re.compile(r"<think>(?:.*?</think>|.*$)", re.DOTALL | re.IGNORECASE)
 
 
 def strip_think_blocks(text: str) -> str:
     if not text:
         return ""
-    text = re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r"<think>.*$", "", text, flags=re.DOTALL | re.IGNORECASE)
-    return text.strip()
+    return _THINK_RE.sub("", text).strip()